@@ -10,15 +10,16 @@
 
 """Module for task generator"""
 
-from datetime import datetime
+from collections import defaultdict, deque
+import bisect
 from enum import Enum, unique
+import heapq
 import operator
 import logging
 import random
 import copy
 import time
 import sys
-import re
 import os
 from typing import Dict
 
@@ -33,13 +34,6 @@ from task.generator.base_task_generator import BaseTaskGenerator
 from task.xml.task_xml_reader import TaskXmlReader
 from task.task_factory import TaskFactory
 
-class LustreOstMigrateItem:
-
-    def __init__(self, ost: int, filename: str) -> None:
-
-        self.ost = ost
-        self.filename = filename
-
 @unique
 class OSTState(Enum):
 
@@ -58,6 +52,23 @@ class LustreOstMigrationTaskGenerator(BaseTaskGenerator):
     MIN_OST_FILL_THRESHOLD_TARGET = 0
     MAX_OST_FILL_THRESHOLD        = 90
 
+    MIN_IDLE_SLEEP_SEC = 0.001
+    MAX_IDLE_SLEEP_SEC = 0.05
+
+    INPUT_FILE_BUFFER_SIZE = 1 << 20
+
+    # OST state transitions, the key None stands for an OST without a state yet.
+    # States not listed in the fill level transitions are kept unchanged.
+    THRESHOLD_MET_TRANSITIONS     = {None:            OSTState.READY,
+                                     OSTState.LOCKED: OSTState.READY}
+
+    THRESHOLD_NOT_MET_TRANSITIONS = {None:             OSTState.LOCKED,
+                                     OSTState.READY:   OSTState.LOCKED,
+                                     OSTState.BLOCKED: OSTState.PENDING_LOCK}
+
+    TASK_FINISHED_TRANSITIONS     = {OSTState.BLOCKED:      OSTState.READY,
+                                     OSTState.PENDING_LOCK: OSTState.LOCKED}
+
     def __init__(self, task_queue: SharedQueue, result_queue: SharedQueueStr, config_file: str) -> None:
 
         super().__init__(task_queue, result_queue, config_file)
@@ -77,27 +88,30 @@ class LustreOstMigrationTaskGenerator(BaseTaskGenerator):
         self.task_name = self._config.get('task', 'task_name')
 
         self.input_dir = self._config.get('migration', 'input_dir')
+        self.processed_dir = os.path.join(self.input_dir, 'processed')
 
         self.ost_fill_level_threshold_source = self._config.getint('migration', 'ost_fill_level_threshold_source')
         self.ost_fill_level_threshold_target = self._config.getint('migration', 'ost_fill_level_threshold_target')
 
         ost_targets = self._config.get('migration', 'ost_targets')
 
-        self.ost_target_list = []
-
-        for ost_target in RangeSet(ost_targets).striter():
-            self.ost_target_list.append(int(ost_target))
+        self.ost_target_list = tuple(int(ost_target) for ost_target in RangeSet(ost_targets).striter())
 
         self.lfs_path = self._config.get('lustre', 'fs_path')
 
-        self._regex = rf"^(\d+) ({self.lfs_path}.*)$"
-        self.pattern = re.compile(self._regex)
+        self._lfs_path_prefix = self.lfs_path.encode()
+        self._field_separator = BaseMessage.field_separator.encode()
 
-        self.ost_cache_dict        = dict[int, list]()
+        self.ost_cache_dict        = defaultdict[int, deque](deque)
         self.ost_source_state_dict = dict[int, OSTState]()
         self.ost_target_state_dict = dict[int, OSTState]()
         self.ost_fill_level_dict   = dict[int, int]()
-        self.source_ost_key_list   = list[int]()
+
+        # Insertion ordered sets of OSTs in state READY, source OSTs with an empty cache are removed on dispatch.
+        self.ost_source_ready_dict = dict[int, None]()
+        self.ost_target_ready_dict = dict[int, None]()
+
+        self.source_ost_sorted_list = list[int]()
 
     def validate_config(self) -> None:
 
@@ -152,174 +166,191 @@ class LustreOstMigrationTaskGenerator(BaseTaskGenerator):
 
             task_skeleton = TaskFactory().create_from_xml_info(task_xml_info)
 
+            os.makedirs(self.processed_dir, exist_ok=True)
+
             self._update_ost_fill_level_dict()
             self._init_ost_target_state_dict()
             self._process_input_files()
 
-            next_time_update_fill_level = int(time.time()) + self.threshold_update_fill_level
-            next_time_reload_files = int(time.time()) + self.threshold_reload_files
-            next_time_print_caches = int(time.time()) + self.threshold_print_caches
+            now = int(time.time())
 
-            # CAUTION: If target ost list changes, this must be recognized.
-            target_ost_key_list = list(self.ost_target_state_dict)
-            len_target_ost_key_list = len(target_ost_key_list)
+            # Heap entries: (next execution time, timer ID to keep the order on equal times, threshold, function)
+            timer_heap = [(now + self.threshold_update_fill_level, 0,
+                           self.threshold_update_fill_level, self._run_ost_fill_level_update),
+                          (now + self.threshold_reload_files, 1,
+                           self.threshold_reload_files, self._run_input_files_reload),
+                          (now + self.threshold_print_caches, 2,
+                           self.threshold_print_caches, self._run_ost_caches_print)]
 
-            next_target_ost_key_index = 0
-            next_source_ost_key_index = 0
+            heapq.heapify(timer_heap)
+
+            idle_sleep = 0.0
+
+            local_mode            = self.local_mode
+            ost_cache_dict        = self.ost_cache_dict
+            ost_source_state_dict = self.ost_source_state_dict
+            ost_target_state_dict = self.ost_target_state_dict
+            ost_source_ready_dict = self.ost_source_ready_dict
+            ost_target_ready_dict = self.ost_target_ready_dict
+            task_queue            = self._task_queue
+            result_queue          = self._result_queue
+            update_ost_state_dict = self._update_ost_state_dict
+            blocked               = OSTState.BLOCKED
 
             while self._run_flag:
 
                 try:
 
-                    counter_checked_target_osts = 0
+                    task_list = []
+                    finished_tid_list = []
 
-                    if next_source_ost_key_index >= len(self.source_ost_key_list):
-                        next_source_ost_key_index = 0
+                    debug_enabled = logging.root.isEnabledFor(logging.DEBUG)
 
-                    while next_source_ost_key_index < len(self.source_ost_key_list):
+                    if ost_target_ready_dict:
 
-                        if counter_checked_target_osts == len_target_ost_key_list:
-                            break
+                        for source_ost in list(ost_source_ready_dict):
 
-                        source_ost = self.source_ost_key_list[next_source_ost_key_index]
-                        next_source_ost_key_index += 1
+                            if not ost_target_ready_dict:
+                                break
 
-                        if self.ost_source_state_dict[source_ost] == OSTState.READY:
+                            ost_cache = ost_cache_dict[source_ost]
 
-                            ost_cache = self.ost_cache_dict[source_ost]
+                            if not ost_cache:
+                                del ost_source_ready_dict[source_ost]
+                                continue
 
-                            if ost_cache:
+                            target_ost = next(iter(ost_target_ready_dict))
 
-                                while next_target_ost_key_index < len_target_ost_key_list:
+                            filename = ost_cache.popleft()
 
-                                    target_ost = target_ost_key_list[next_target_ost_key_index]
-                                    next_target_ost_key_index +=1
-                                    counter_checked_target_osts += 1
+                            task = copy.copy(task_skeleton)
+                            task.tid = f"{source_ost}:{target_ost}"
 
-                                    target_state = self.ost_target_state_dict[target_ost]
+                            # Could provice an interface for initialization of different migrate tasks
+                            # e.g. task.initialize(...)
+                            if not local_mode:
 
-                                    if target_state == OSTState.READY:
+                                task.source_ost = source_ost
+                                task.target_ost = target_ost
+                                task.filename = filename
 
-                                        item = ost_cache.pop()
+                            task_list.append(task)
 
-                                        task = copy.copy(task_skeleton)
-                                        task.tid = f"{source_ost}:{target_ost}"
+                            ost_source_state_dict[source_ost] = blocked
+                            ost_target_state_dict[target_ost] = blocked
 
-                                        # Could provice an interface for initialization of different migrate tasks
-                                        # e.g. task.initialize(...)
-                                        if not self.local_mode:
+                            del ost_source_ready_dict[source_ost]
+                            del ost_target_ready_dict[target_ost]
 
-                                            task.source_ost = source_ost
-                                            task.target_ost = target_ost
-                                            task.filename = item.filename
+                    for task in task_list:
 
-                                        logging.debug("Pushing task with TID to task queue: %s", task.tid)
-                                        self._task_queue.push(task)
+                        if debug_enabled:
+                            logging.debug("Pushing task with TID to task queue: %s", task.tid)
 
-                                        self.ost_source_state_dict[source_ost] = OSTState.BLOCKED
-                                        self.ost_target_state_dict[target_ost] = OSTState.BLOCKED
+                        task_queue.push(task)
 
-                                        break
+                    finished_tid = result_queue.pop_nowait()
 
-                                if next_target_ost_key_index == len_target_ost_key_list:
-                                    next_target_ost_key_index = 0
+                    while finished_tid:
+                        finished_tid_list.append(finished_tid)
+                        finished_tid = result_queue.pop_nowait()
 
-                    while not self._result_queue.is_empty():
+                    for finished_tid in finished_tid_list:
 
-                        finished_tid = self._result_queue.pop()
-                        logging.debug("Popped TID from result queue: %s", finished_tid)
+                        if debug_enabled:
+                            logging.debug("Popped TID from result queue: %s", finished_tid)
 
-                        split_result = finished_tid.split(":")
-                        source_ost = int(split_result[0])
-                        target_ost = int(split_result[1])
+                        raw_source_ost, _, raw_target_ost = finished_tid.partition(":")
+                        source_ost = int(raw_source_ost)
+                        target_ost = int(raw_target_ost)
 
-                        self._update_ost_state_dict(source_ost, self.ost_source_state_dict)
-                        self._update_ost_state_dict(target_ost, self.ost_target_state_dict)
+                        update_ost_state_dict(source_ost, ost_source_state_dict, ost_source_ready_dict)
+                        update_ost_state_dict(target_ost, ost_target_state_dict, ost_target_ready_dict)
 
                     last_run_time = int(time.time())
 
-                    if last_run_time >= next_time_update_fill_level:
-
-                        next_time_update_fill_level = \
-                            last_run_time + self.threshold_update_fill_level
+                    while timer_heap[0][0] <= last_run_time:
 
-                        logging.info("###### OST Fill Level Update ######")
+                        _, timer_id, threshold, timer_func = heapq.heappop(timer_heap)
+                        timer_func()
+                        heapq.heappush(timer_heap, (last_run_time + threshold, timer_id, threshold, timer_func))
 
-                        start_time = datetime.now()
-                        self._update_ost_fill_level_dict()
-                        elapsed_time = datetime.now() - start_time
+                    if not ost_cache_dict:
+                        idle_sleep = 0.0
+                        self._interruptable_sleep.sleep(1)
+                    elif task_list or finished_tid_list:
+                        idle_sleep = 0.0
+                        os.sched_yield()
+                    else:
+                        idle_sleep = min(max(idle_sleep * 2, self.MIN_IDLE_SLEEP_SEC), self.MAX_IDLE_SLEEP_SEC)
+                        self._interruptable_sleep.sleep(idle_sleep)
 
-                        logging.info("Elapsed time: %s - Number of OSTs: %i", elapsed_time, len(self.ost_fill_level_dict))
+                except InterruptedError:
+                    logging.error('Caught InterruptedError exception')
 
-                        if logging.root.isEnabledFor(logging.DEBUG):
+        except Exception:
+            logging.exception("Caught exception in %s", self._name)
+            logging.info("%s exited!", self._name)
+            sys.exit(1)
 
-                            for ost, fill_level in self.ost_fill_level_dict.items():
-                                logging.info("OST: %i - Fill Level: %i", ost, fill_level)
+        logging.info("%s finished!", self._name)
+        sys.exit(0)
 
-                        for ost in self.ost_source_state_dict:
-                            self._update_ost_source_state_dict(ost)
+    def _run_ost_fill_level_update(self) -> None:
 
-                        for ost in self.ost_target_state_dict:
-                            self._update_ost_target_state_dict(ost)
+        logging.info("###### OST Fill Level Update ######")
 
-                    if last_run_time >= next_time_reload_files:
+        start_time = time.perf_counter()
+        self._update_ost_fill_level_dict()
+        elapsed_time = time.perf_counter() - start_time
 
-                        next_time_reload_files = last_run_time + self.threshold_reload_files
+        logging.info("Elapsed time: %.3fs - Number of OSTs: %i", elapsed_time, len(self.ost_fill_level_dict))
 
-                        logging.info("###### Loading Input Files ######")
+        if logging.root.isEnabledFor(logging.DEBUG):
 
-                        self._process_input_files()
+            for ost, fill_level in self.ost_fill_level_dict.items():
+                logging.info("OST: %i - Fill Level: %i", ost, fill_level)
 
-                    if last_run_time >= next_time_print_caches:
+        for ost in self.ost_source_state_dict:
+            self._update_ost_source_state_dict(ost)
 
-                        next_time_print_caches = last_run_time + self.threshold_print_caches
+        for ost in self.ost_target_list:
+            self._update_ost_target_state_dict(ost)
 
-                        logging.info("###### OST Cache Sizes ######")
+    def _run_input_files_reload(self) -> None:
 
-                        ost_cache_ids = self.ost_cache_dict.keys()
+        logging.info("###### Loading Input Files ######")
 
-                        if ost_cache_ids:
+        self._process_input_files()
 
-                            for source_ost in sorted(ost_cache_ids, key=int):
-                                logging.info("OST: %s - Size: %i", source_ost, len(self.ost_cache_dict[source_ost]))
-                        else:
-                            logging.info("All OST caches empty")
+    def _run_ost_caches_print(self) -> None:
 
-                        self._deallocate_empty_ost_caches()
+        logging.info("###### OST Cache Sizes ######")
 
-                    if self.ost_cache_dict:
-                        self._interruptable_sleep.sleep(0.001)
-                    else:
-                        self._interruptable_sleep.sleep(1)
+        if self.source_ost_sorted_list:
 
-                except InterruptedError:
-                    logging.error('Caught InterruptedError exception')
+            for source_ost in self.source_ost_sorted_list:
+                logging.info("OST: %s - Size: %i", source_ost, len(self.ost_cache_dict[source_ost]))
+        else:
+            logging.info("All OST caches empty")
 
-        except Exception:
-            logging.exception("Caught exception in %s", self._name)
-            logging.info("%s exited!", self._name)
-            sys.exit(1)
-
-        logging.info("%s finished!", self._name)
-        sys.exit(0)
+        self._deallocate_empty_ost_caches()
 
     def _process_input_files(self) -> None:
 
         file_counter = 0
 
-        files = os.listdir(self.input_dir)
-
-        for file in files:
+        with os.scandir(self.input_dir) as entries:
 
-            if file.endswith(".input"):
+            for entry in entries:
 
-                file_path = self.input_dir + os.path.sep + file
+                if entry.name.endswith(".input") and entry.is_file():
 
-                self._load_input_file(file_path)
+                    self._load_input_file(entry.path)
 
-                os.renames(file_path, file_path + ".done")
+                    os.rename(entry.path, os.path.join(self.processed_dir, entry.name + ".done"))
 
-                file_counter += 1
+                    file_counter += 1
 
         if file_counter:
 
@@ -338,34 +369,29 @@ class LustreOstMigrationTaskGenerator(BaseTaskGenerator):
 
             logging.debug("Loading input file: %s", file_path)
 
-            with open(file_path, mode="rb") as reader:
+            with open(file_path, mode="rb", buffering=self.INPUT_FILE_BUFFER_SIZE) as reader:
 
                 for raw_line in reader:
 
+                    raw_line = raw_line.rstrip(b'\r\n')
+
                     try:
 
                         if not raw_line:
                             continue
 
-                        line = raw_line.decode(errors='strict')
-
-                        if BaseMessage.field_separator in line:
+                        if self._field_separator in raw_line:
                             raise RuntimeError('File separator found')
 
-                        match = self.pattern.search(line)
+                        raw_ost, _, raw_filename = raw_line.partition(b' ')
 
-                        if not match:
-                            raise RuntimeError(f"Regex '{self._regex}' did not match")
+                        if not raw_ost.isdigit() or not raw_filename.startswith(self._lfs_path_prefix):
+                            raise RuntimeError(f"Line does not match format '<ost> {self.lfs_path}...'")
 
-                        ost      = int(match.group(1))
-                        filename = match.group(2)
+                        ost      = int(raw_ost)
+                        filename = raw_filename.decode(errors='strict')
 
-                        migrate_item = LustreOstMigrateItem(ost, filename)
-
-                        if ost not in self.ost_cache_dict:
-                            self.ost_cache_dict[ost] = []
-
-                        self.ost_cache_dict[ost].append(migrate_item)
+                        self.ost_cache_dict[ost].append(filename)
 
                         loaded_counter += 1
 
@@ -373,9 +399,9 @@ class LustreOstMigrationTaskGenerator(BaseTaskGenerator):
                         line = raw_line.decode(errors='replace')
                         logging.error("Decoding failed for line: %s", line)
                         error_counter += 1
-                        continue
 
                     except RuntimeError as error:
+                        line = raw_line.decode(errors='replace')
                         logging.error("Failed line - %s: %s", error, line)
                         error_counter += 1
 
@@ -391,8 +417,9 @@ class LustreOstMigrationTaskGenerator(BaseTaskGenerator):
             if cache:
                 if ost not in self.ost_source_state_dict:
                     self._update_ost_source_state_dict(ost)
-
-        self.source_ost_key_list = list(self.ost_source_state_dict)
+                    bisect.insort(self.source_ost_sorted_list, ost)
+                elif self.ost_source_state_dict[ost] is OSTState.READY:
+                    self.ost_source_ready_dict[ost] = None
 
     def _deallocate_empty_ost_caches(self) -> None:
 
@@ -402,8 +429,7 @@ class LustreOstMigrationTaskGenerator(BaseTaskGenerator):
 
             if len(cache) == 0:
 
-                if self.ost_source_state_dict[ost] == OSTState.READY \
-                        or self.ost_source_state_dict[ost] == OSTState.LOCKED:
+                if self.ost_source_state_dict[ost] in (OSTState.READY, OSTState.LOCKED):
 
                     empty_ost_cache_ids.append(ost)
 
@@ -413,8 +439,8 @@ class LustreOstMigrationTaskGenerator(BaseTaskGenerator):
 
                 del self.ost_cache_dict[ost]
                 del self.ost_source_state_dict[ost]
-
-        self.source_ost_key_list = list(self.ost_source_state_dict)
+                self.ost_source_ready_dict.pop(ost, None)
+                self.source_ost_sorted_list.remove(ost)
 
     def _init_ost_target_state_dict(self) -> None:
 
@@ -425,27 +451,29 @@ class LustreOstMigrationTaskGenerator(BaseTaskGenerator):
 
         if self.local_mode:
 
-            self.ost_fill_level_dict.clear()
-
-            for ost_idx in range(self.num_osts):
-                fill_level = random.randint(40, 60)
-
-                self.ost_fill_level_dict[ost_idx] = fill_level
+            fill_levels = random.choices(range(40, 61), k=self.num_osts)
+            self.ost_fill_level_dict = dict(enumerate(fill_levels))
 
         else:
             self.ost_fill_level_dict = self.lfs_utils.retrieve_ost_disk_usage(self.lfs_path)
 
     def _update_ost_source_state_dict(self, ost: int) -> None:
-        self._update_ost_state_dict(ost, self.ost_source_state_dict, operator.gt)
+        self._update_ost_state_dict(ost, self.ost_source_state_dict, self.ost_source_ready_dict, operator.gt)
 
     def _update_ost_target_state_dict(self, ost: int) -> None:
-        self._update_ost_state_dict(ost, self.ost_target_state_dict, operator.lt)
+        self._update_ost_state_dict(ost, self.ost_target_state_dict, self.ost_target_ready_dict, operator.lt)
 
-    def _update_ost_state_dict(self, ost: int, ost_state_dict: Dict[int, OSTState], operator_func = None) -> None:
+    def _update_ost_state_dict(self,
+                               ost: int,
+                               ost_state_dict: Dict[int, OSTState],
+                               ost_ready_dict: Dict[int, None],
+                               operator_func = None) -> None:
 
         if operator_func:
 
-            if ost not in self.ost_fill_level_dict:
+            ost_fill_level = self.ost_fill_level_dict.get(ost)
+
+            if ost_fill_level is None:
                 raise RuntimeError(f"OST not found in ost_fill_level_dict: {ost}")
 
             if operator_func is operator.gt:
@@ -455,35 +483,26 @@ class LustreOstMigrationTaskGenerator(BaseTaskGenerator):
             else:
                 raise RuntimeError(f"operator_func is not supported: {operator_func}")
 
-            ost_fill_level = self.ost_fill_level_dict[ost]
+            ost_state = ost_state_dict.get(ost)
 
             if operator_func(ost_fill_level, ost_fill_level_threshold):
-
-                if ost in ost_state_dict:
-
-                    if ost_state_dict[ost] == OSTState.LOCKED:
-                        ost_state_dict[ost] = OSTState.READY
-
-                else:
-                    ost_state_dict[ost] = OSTState.READY
-
+                new_ost_state = self.THRESHOLD_MET_TRANSITIONS.get(ost_state, ost_state)
             else:
+                new_ost_state = self.THRESHOLD_NOT_MET_TRANSITIONS.get(ost_state, ost_state)
 
-                if ost in ost_state_dict:
+        else:
 
-                    if ost_state_dict[ost] == OSTState.READY:
-                        ost_state_dict[ost] = OSTState.LOCKED
-                    elif ost_state_dict[ost] == OSTState.BLOCKED:
-                        ost_state_dict[ost] = OSTState.PENDING_LOCK
+            ost_state = ost_state_dict[ost]
+            new_ost_state = self.TASK_FINISHED_TRANSITIONS.get(ost_state)
 
-                else:
-                    ost_state_dict[ost] = OSTState.LOCKED
+            if new_ost_state is None:
+                raise RuntimeError("Inconsistency in OST state dictionaries found!")
 
-        else:
+        if new_ost_state is not ost_state:
+
+            ost_state_dict[ost] = new_ost_state
 
-            if ost_state_dict[ost] == OSTState.BLOCKED:
-                ost_state_dict[ost] = OSTState.READY
-            elif ost_state_dict[ost] == OSTState.PENDING_LOCK:
-                ost_state_dict[ost] = OSTState.LOCKED
+            if new_ost_state is OSTState.READY:
+                ost_ready_dict[ost] = None
             else:
-                raise RuntimeError("Inconsistency in OST state dictionaries found!")
+                ost_ready_dict.pop(ost, None)